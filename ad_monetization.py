@@ -1,26 +1,34 @@
+import time
 import secrets
-from datetime import datetime, timedelta
 
 from logger import LOGGER
 from database_sqlite import db
 
+log = LOGGER(__name__)
+
 PREMIUM_DOWNLOADS = 5
 SESSION_VALIDITY_MINUTES = 30
 
+# Valid codes are always 8 uppercase hex chars (see _generate_verification_code)
+CODE_LENGTH = 8
+_CODE_CHARS = frozenset("0123456789ABCDEF")
+
 class AdMonetization:
     def __init__(self):
         # All ads are on website only - no URL shorteners needed
         self.adsterra_smartlink = "https://www.effectivegatecpm.com/zn01rc1vt?key=78d0724d73f6154a582464c95c28210d"
         self.blog_url = "https://socialhub00.blogspot.com/"
         
-        LOGGER(__name__).info("Ad Monetization initialized - using Adsterra SmartLink to blog")
+        log.info("Ad Monetization initialized - using Adsterra SmartLink to blog")
     
     def create_ad_session(self, user_id: int) -> str:
         """Create a temporary session for ad watching"""
-        session_id = secrets.token_hex(16)
+        # token_bytes(16).hex() == token_hex(16) but skips binascii.hexlify
+        # for bytes.hex(), which is measurably cheaper per session
+        session_id = secrets.token_bytes(16).hex()
         db.create_ad_session(session_id, user_id)
         
-        LOGGER(__name__).info(f"Created ad session {session_id} for user {user_id}")
+        log.info(f"Created ad session {session_id} for user {user_id}")
         return session_id
     
     def verify_ad_completion(self, session_id: str) -> tuple[bool, str, str]:
@@ -30,10 +38,9 @@ class AdMonetization:
         if not session_data:
             return False, "", "❌ Invalid or expired session. Please start over with /getpremium"
         
-        # Check if session expired (30 minutes max)
-        elapsed_time = datetime.now() - session_data['created_at']
-        if elapsed_time > timedelta(minutes=SESSION_VALIDITY_MINUTES):
-            db.delete_ad_session(session_id)
+        # Check if session expired (30 minutes max) - created_at is epoch seconds.
+        # No per-request delete: the periodic cleanup sweep purges expired rows in batch
+        if time.time() - session_data['created_at'] > SESSION_VALIDITY_MINUTES * 60:
             return False, "", "⏰ Session expired. Please start over with /getpremium"
         
         # Atomically mark session as used (prevents race condition)
@@ -43,44 +50,52 @@ class AdMonetization:
         
         # Generate verification code
         verification_code = self._generate_verification_code(session_data['user_id'])
-        
-        # Delete session after successful verification
-        db.delete_ad_session(session_id)
-        
-        LOGGER(__name__).info(f"User {session_data['user_id']} completed ad session {session_id}, generated code {verification_code}")
+
+        # The used flag set above already blocks reuse; the spent session
+        # row is removed by the periodic cleanup sweep instead of a write here
+
+
+        log.info(f"User {session_data['user_id']} completed ad session {session_id}, generated code {verification_code}")
         return True, verification_code, "✅ Ad completed! Here's your verification code"
     
     def _generate_verification_code(self, user_id: int) -> str:
         """Generate verification code after ad is watched"""
-        code = secrets.token_hex(4).upper()
+        # Format 32 random bits straight to uppercase hex - token_hex(4).upper()
+        # hexlifies lowercase first and then re-walks the string to uppercase it
+        code = f"{secrets.randbits(32):08X}"
         db.create_verification_code(code, user_id)
         
-        LOGGER(__name__).info(f"Generated verification code {code} for user {user_id}")
+        log.info(f"Generated verification code {code} for user {user_id}")
         return code
     
     def verify_code(self, code: str, user_id: int) -> tuple[bool, str]:
         """Verify user's code and grant free downloads"""
         code = code.upper().strip()
-        
+
+        # Reject malformed input before querying the store - typos and junk
+        # make up most failed attempts and never need a lookup
+        if len(code) != CODE_LENGTH or not _CODE_CHARS.issuperset(code):
+            return False, "❌ **Invalid verification code.**\n\nPlease make sure you entered the code correctly or get a new one with `/getpremium`"
+
         verification_data = db.get_verification_code(code)
-        
+
         if not verification_data:
             return False, "❌ **Invalid verification code.**\n\nPlease make sure you entered the code correctly or get a new one with `/getpremium`"
         
         if verification_data['user_id'] != user_id:
             return False, "❌ **This verification code belongs to another user.**"
         
-        created_at = verification_data['created_at']
-        if datetime.now() - created_at > timedelta(minutes=30):
-            db.delete_verification_code(code)
+        # created_at is epoch seconds - codes expire after 30 minutes.
+        # Expired rows are left for the batched cleanup sweep to purge
+        if time.time() - verification_data['created_at'] > 30 * 60:
             return False, "⏰ **Verification code has expired.**\n\nCodes expire after 30 minutes. Please get a new one with `/getpremium`"
         
-        db.delete_verification_code(code)
-        
-        # Grant ad downloads
-        db.add_ad_downloads(user_id, PREMIUM_DOWNLOADS)
-        
-        LOGGER(__name__).info(f"User {user_id} successfully verified code {code}, granted {PREMIUM_DOWNLOADS} ad downloads")
+        # Consume the code and grant downloads in one locked step
+        if not db.redeem_verification_code(code, user_id, PREMIUM_DOWNLOADS):
+            return False, "❌ **Invalid verification code.**\n\nPlease make sure you entered the code correctly or get a new one with `/getpremium`"
+
+
+        log.info(f"User {user_id} successfully verified code {code}, granted {PREMIUM_DOWNLOADS} ad downloads")
         return True, f"✅ **Verification successful!**\n\nYou now have **{PREMIUM_DOWNLOADS} free download(s)**!"
     
     def generate_ad_link(self, user_id: int, bot_domain: str | None = None) -> tuple[str, str]:
@@ -99,7 +114,7 @@ class AdMonetization:
             from urllib.parse import quote
             first_page_url += f"&app_url={quote(bot_domain)}"
         
-        LOGGER(__name__).info(f"User {user_id}: Sending to blog homepage for ad verification - app_url: {bot_domain}")
+        log.info(f"User {user_id}: Sending to blog homepage for ad verification - app_url: {bot_domain}")
         
         return session_id, first_page_url
     
@@ -3,13 +3,22 @@
 # SQLite-based database (replaces MongoDB for ~50-95MB RAM savings)
 
 import os
+import time
 import sqlite3
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 from logger import LOGGER
-from cache import get_cache
+from cache import get_cache, IS_CONSTRAINED
 from threading import Lock
 
+log = LOGGER(__name__)
+
+# SQLite tuning applied on every connection open.
+# Keep the page cache and mmap window small on Render/Replit (512MB RAM);
+# roomier budgets elsewhere. Negative cache_size is KB, not pages.
+_SQLITE_CACHE_KB = 8000 if IS_CONSTRAINED else 64000
+_SQLITE_MMAP_SIZE = 256 * 1024 * 1024 if IS_CONSTRAINED else 30_000_000_000
+
 class DatabaseManager:
     def __init__(self, db_path: Optional[str] = None):
         if not db_path:
@@ -21,16 +30,36 @@ class DatabaseManager:
         
         try:
             self._init_database()
-            LOGGER(__name__).info(f"Successfully connected to SQLite database: {db_path}")
+            self._ephemeral = self._init_ephemeral()
+            log.info(f"Successfully connected to SQLite database: {db_path}")
         except Exception as e:
-            LOGGER(__name__).error(f"SQLite initialization error: {e}")
+            log.error(f"SQLite initialization error: {e}")
             raise
 
     def _get_connection(self):
         conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA cache_size=-{_SQLITE_CACHE_KB}')
+        conn.execute(f'PRAGMA mmap_size={_SQLITE_MMAP_SIZE}')
         return conn
 
+    def checkpoint_wal(self) -> bool:
+        """Truncate the WAL file back into the main database.
+        Called periodically from the cleanup watchdog so the WAL
+        doesn't grow unbounded under sustained write traffic."""
+        try:
+            with self.lock:
+                conn = self._get_connection()
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                conn.close()
+            return True
+        except Exception as e:
+            log.error(f"Error checkpointing WAL: {e}")
+            return False
+
     def _init_database(self):
         with self.lock:
             conn = self._get_connection()
@@ -84,23 +113,6 @@ class DatabaseManager:
                 )
             ''')
             
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS ad_sessions (
-                    session_id TEXT PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    created_at TEXT NOT NULL,
-                    used INTEGER DEFAULT 0
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS ad_verifications (
-                    code TEXT PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-            ''')
-            
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS legal_acceptance (
                     user_id INTEGER PRIMARY KEY,
@@ -113,14 +125,47 @@ class DatabaseManager:
             ''')
             
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_usage_user_date ON daily_usage(user_id, date)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_ad_sessions_created ON ad_sessions(created_at)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_ad_verifications_created ON ad_verifications(created_at)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_legal_acceptance_date ON legal_acceptance(acceptance_date)')
-            
+
             conn.commit()
             conn.close()
-            
-            LOGGER(__name__).info("Database tables and indexes created successfully")
+
+            log.info("Database tables and indexes created successfully")
+
+    def _init_ephemeral(self):
+        """Create the in-memory store for ad sessions and verification codes.
+
+        These rows live for at most an hour and are recreated on demand, so
+        they don't belong in the backed-up file database. A single shared
+        :memory: connection keeps the entire ad hot path off the disk; all
+        access goes through self.lock since the connection is shared across
+        the bot and WSGI threads (both run in this process).
+
+        WITHOUT ROWID: always looked up by their natural text key, so skipping
+        the rowid indirection saves one B-tree hop. created_at holds epoch
+        seconds (time.time()) so expiry checks are plain float comparisons.
+        """
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('''
+            CREATE TABLE ad_sessions (
+                session_id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                used INTEGER DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE ad_verifications (
+                code TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX idx_ad_sessions_created ON ad_sessions(created_at)')
+        conn.execute('CREATE INDEX idx_ad_verifications_created ON ad_verifications(created_at)')
+        conn.commit()
+        return conn
 
     def add_user(self, user_id: int, username: Optional[str] = None, first_name: Optional[str] = None,
                  last_name: Optional[str] = None, user_type: str = 'free') -> bool:
@@ -162,11 +207,11 @@ class DatabaseManager:
                     from cloud_backup import trigger_backup_on_critical_change
                     trigger_backup_on_critical_change("add_user", user_id)
                 except Exception as e:
-                    LOGGER(__name__).warning(f"Backup trigger failed for add_user: {e}")
+                    log.warning(f"Backup trigger failed for add_user: {e}")
             
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error adding user {user_id}: {e}")
+            log.error(f"Error adding user {user_id}: {e}")
             return False
 
     def get_user(self, user_id: int) -> Optional[Dict]:
@@ -189,7 +234,7 @@ class DatabaseManager:
                 return user
             return None
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting user {user_id}: {e}")
+            log.error(f"Error getting user {user_id}: {e}")
             return None
 
     def get_user_type(self, user_id: int) -> str:
@@ -219,7 +264,7 @@ class DatabaseManager:
                                    ('free', user_id))
                     conn.commit()
                     conn.close()
-                LOGGER(__name__).info(f"User {user_id} premium expired, downgraded to free")
+                log.info(f"User {user_id} premium expired, downgraded to free")
 
         return 'free'
 
@@ -238,7 +283,7 @@ class DatabaseManager:
             self.cache.set(cache_key, is_admin, ttl=300)
             return is_admin
         except Exception as e:
-            LOGGER(__name__).error(f"Error checking admin status for {user_id}: {e}")
+            log.error(f"Error checking admin status for {user_id}: {e}")
             return False
 
     def add_admin(self, user_id: int, added_by: int) -> bool:
@@ -254,7 +299,7 @@ class DatabaseManager:
             self.cache.delete(f"user_{user_id}")
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error adding admin {user_id}: {e}")
+            log.error(f"Error adding admin {user_id}: {e}")
             return False
 
     def remove_admin(self, user_id: int) -> bool:
@@ -270,7 +315,7 @@ class DatabaseManager:
             self.cache.delete(f"user_{user_id}")
             return deleted
         except Exception as e:
-            LOGGER(__name__).error(f"Error removing admin {user_id}: {e}")
+            log.error(f"Error removing admin {user_id}: {e}")
             return False
 
     def set_user_type(self, user_id: int, user_type: str, days: int = 30) -> bool:
@@ -294,7 +339,7 @@ class DatabaseManager:
             
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error setting user type for {user_id}: {e}")
+            log.error(f"Error setting user type for {user_id}: {e}")
             return False
 
     def set_premium(self, user_id: int, expiry_datetime: str, source: str = "ads") -> bool:
@@ -315,7 +360,7 @@ class DatabaseManager:
                     if existing_expiry > datetime.now():
                         existing_source = user.get('premium_source')
                         if source == 'ads' and existing_source != 'ads':
-                            LOGGER(__name__).warning(
+                            log.warning(
                                 f"User {user_id} has active premium until {existing_end}. Skipping ad-based premium.")
                             return False
             
@@ -336,11 +381,11 @@ class DatabaseManager:
                     from cloud_backup import trigger_backup_on_critical_change
                     trigger_backup_on_critical_change("set_premium", user_id)
                 except Exception as e:
-                    LOGGER(__name__).warning(f"Backup trigger failed for set_premium: {e}")
+                    log.warning(f"Backup trigger failed for set_premium: {e}")
             
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error setting premium for {user_id}: {e}")
+            log.error(f"Error setting premium for {user_id}: {e}")
             return False
 
     def get_daily_usage(self, user_id: int, date: Optional[str] = None) -> int:
@@ -355,7 +400,7 @@ class DatabaseManager:
             conn.close()
             return row['files_downloaded'] if row else 0
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting daily usage for {user_id}: {e}")
+            log.error(f"Error getting daily usage for {user_id}: {e}")
             return 0
 
     def increment_usage(self, user_id: int, count: int = 1) -> bool:
@@ -372,7 +417,7 @@ class DatabaseManager:
             
             if ad_downloads > 0:
                 if count > ad_downloads:
-                    LOGGER(__name__).warning(f"User {user_id} has only {ad_downloads} ad downloads but needs {count}")
+                    log.warning(f"User {user_id} has only {ad_downloads} ad downloads but needs {count}")
                     return False
                 
                 with self.lock:
@@ -385,16 +430,16 @@ class DatabaseManager:
                     conn.close()
                 
                 if success:
-                    LOGGER(__name__).info(f"User {user_id} used {count} ad download(s), {ad_downloads - count} remaining")
+                    log.info(f"User {user_id} used {count} ad download(s), {ad_downloads - count} remaining")
                     self.cache.delete(f"user_{user_id}")
                     return True
                 else:
-                    LOGGER(__name__).error(f"Failed to deduct {count} ad downloads for user {user_id}")
+                    log.error(f"Failed to deduct {count} ad downloads for user {user_id}")
                     return False
             
             daily_usage = self.get_daily_usage(user_id)
             if daily_usage + count > 5:
-                LOGGER(__name__).warning(f"User {user_id} tried to exceed daily limit: {daily_usage} + {count} > 5")
+                log.warning(f"User {user_id} tried to exceed daily limit: {daily_usage} + {count} > 5")
                 return False
             
             date = datetime.now().strftime('%Y-%m-%d')
@@ -409,7 +454,7 @@ class DatabaseManager:
             
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error incrementing usage for {user_id}: {e}")
+            log.error(f"Error incrementing usage for {user_id}: {e}")
             return False
 
     def can_download(self, user_id: int, count: int = 1) -> tuple[bool, str]:
@@ -445,7 +490,7 @@ class DatabaseManager:
             conn.close()
             return users
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting all users: {e}")
+            log.error(f"Error getting all users: {e}")
             return []
 
     def save_broadcast(self, message: str, sent_by: int, total_users: int, successful_sends: int) -> bool:
@@ -459,7 +504,7 @@ class DatabaseManager:
                 conn.close()
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error saving broadcast: {e}")
+            log.error(f"Error saving broadcast: {e}")
             return False
 
     def ban_user(self, user_id: int) -> bool:
@@ -475,7 +520,7 @@ class DatabaseManager:
             self.cache.delete(f"user_{user_id}")
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error banning user {user_id}: {e}")
+            log.error(f"Error banning user {user_id}: {e}")
             return False
 
     def unban_user(self, user_id: int) -> bool:
@@ -491,7 +536,7 @@ class DatabaseManager:
             self.cache.delete(f"user_{user_id}")
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error unbanning user {user_id}: {e}")
+            log.error(f"Error unbanning user {user_id}: {e}")
             return False
 
     def is_banned(self, user_id: int) -> bool:
@@ -527,11 +572,11 @@ class DatabaseManager:
                     from cloud_backup import trigger_backup_on_session
                     trigger_backup_on_session(user_id)
                 except Exception as e:
-                    LOGGER(__name__).warning(f"Backup trigger failed for user {user_id}: {e}")
+                    log.warning(f"Backup trigger failed for user {user_id}: {e}")
             
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error setting session for {user_id}: {e}")
+            log.error(f"Error setting session for {user_id}: {e}")
             return False
 
     def get_user_session(self, user_id: int) -> Optional[str]:
@@ -577,7 +622,7 @@ class DatabaseManager:
                 'today_new_users': today_new_users
             }
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting stats: {e}")
+            log.error(f"Error getting stats: {e}")
             return {}
     
     def set_custom_thumbnail(self, user_id: int, file_id: str) -> bool:
@@ -591,7 +636,7 @@ class DatabaseManager:
                 conn.close()
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error setting custom thumbnail for {user_id}: {e}")
+            log.error(f"Error setting custom thumbnail for {user_id}: {e}")
             return False
 
     def get_custom_thumbnail(self, user_id: int) -> Optional[str]:
@@ -609,7 +654,7 @@ class DatabaseManager:
                 conn.close()
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error deleting custom thumbnail for {user_id}: {e}")
+            log.error(f"Error deleting custom thumbnail for {user_id}: {e}")
             return False
 
     def add_ad_downloads(self, user_id: int, count: int) -> bool:
@@ -628,11 +673,11 @@ class DatabaseManager:
                     from cloud_backup import trigger_backup_on_critical_change
                     trigger_backup_on_critical_change("add_ad_downloads", user_id)
                 except Exception as e:
-                    LOGGER(__name__).warning(f"Backup trigger failed for add_ad_downloads: {e}")
+                    log.warning(f"Backup trigger failed for add_ad_downloads: {e}")
             
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error adding ad downloads for {user_id}: {e}")
+            log.error(f"Error adding ad downloads for {user_id}: {e}")
             return False
 
     def reset_ad_downloads_if_needed(self, user_id: int):
@@ -655,104 +700,115 @@ class DatabaseManager:
     def create_ad_session(self, session_id: str, user_id: int) -> bool:
         try:
             with self.lock:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                cursor.execute('INSERT INTO ad_sessions (session_id, user_id, created_at) VALUES (?, ?, ?)',
-                               (session_id, user_id, datetime.now().isoformat()))
-                conn.commit()
-                conn.close()
+                self._ephemeral.execute('INSERT INTO ad_sessions (session_id, user_id, created_at) VALUES (?, ?, ?)',
+                                        (session_id, user_id, time.time()))
+                self._ephemeral.commit()
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error creating ad session: {e}")
+            log.error(f"Error creating ad session: {e}")
             return False
 
     def get_ad_session(self, session_id: str) -> Optional[Dict]:
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM ad_sessions WHERE session_id = ?', (session_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
+            with self.lock:
+                cursor = self._ephemeral.execute('SELECT * FROM ad_sessions WHERE session_id = ? LIMIT 1', (session_id,))
+                row = cursor.fetchone()
+
             if row:
                 session = dict(row)
-                session['created_at'] = datetime.fromisoformat(session['created_at'])
                 session['used'] = bool(session['used'])
                 return session
             return None
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting ad session: {e}")
+            log.error(f"Error getting ad session: {e}")
             return None
 
     def mark_ad_session_used(self, session_id: str) -> bool:
         try:
             with self.lock:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                cursor.execute('UPDATE ad_sessions SET used = 1 WHERE session_id = ? AND used = 0', (session_id,))
+                cursor = self._ephemeral.execute('UPDATE ad_sessions SET used = 1 WHERE session_id = ? AND used = 0', (session_id,))
                 success = cursor.rowcount > 0
-                conn.commit()
-                conn.close()
+                self._ephemeral.commit()
             return success
         except Exception as e:
-            LOGGER(__name__).error(f"Error marking ad session used: {e}")
+            log.error(f"Error marking ad session used: {e}")
             return False
 
     def delete_ad_session(self, session_id: str) -> bool:
         try:
             with self.lock:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM ad_sessions WHERE session_id = ?', (session_id,))
-                conn.commit()
-                conn.close()
+                self._ephemeral.execute('DELETE FROM ad_sessions WHERE session_id = ?', (session_id,))
+                self._ephemeral.commit()
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error deleting ad session: {e}")
+            log.error(f"Error deleting ad session: {e}")
             return False
 
     def create_verification_code(self, code: str, user_id: int) -> bool:
         try:
             with self.lock:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                cursor.execute('INSERT INTO ad_verifications (code, user_id, created_at) VALUES (?, ?, ?)',
-                               (code, user_id, datetime.now().isoformat()))
-                conn.commit()
-                conn.close()
+                self._ephemeral.execute('INSERT INTO ad_verifications (code, user_id, created_at) VALUES (?, ?, ?)',
+                                        (code, user_id, time.time()))
+                self._ephemeral.commit()
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error creating verification code: {e}")
+            log.error(f"Error creating verification code: {e}")
             return False
 
     def get_verification_code(self, code: str) -> Optional[Dict]:
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM ad_verifications WHERE code = ?', (code,))
-            row = cursor.fetchone()
-            conn.close()
-            
+            with self.lock:
+                cursor = self._ephemeral.execute('SELECT * FROM ad_verifications WHERE code = ? LIMIT 1', (code,))
+                row = cursor.fetchone()
+
             if row:
-                verification = dict(row)
-                verification['created_at'] = datetime.fromisoformat(verification['created_at'])
-                return verification
+                return dict(row)
             return None
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting verification code: {e}")
+            log.error(f"Error getting verification code: {e}")
             return None
 
     def delete_verification_code(self, code: str) -> bool:
         try:
             with self.lock:
+                self._ephemeral.execute('DELETE FROM ad_verifications WHERE code = ?', (code,))
+                self._ephemeral.commit()
+            return True
+        except Exception as e:
+            log.error(f"Error deleting verification code: {e}")
+            return False
+
+    def redeem_verification_code(self, code: str, user_id: int, count: int) -> bool:
+        """Consume a verification code and grant ad downloads in one step.
+
+        The code row lives in the ephemeral store and the grant in the file
+        database, so a single SQL transaction can't span both; holding the
+        manager lock across both writes gives the same in-process guarantee
+        with one lock acquisition instead of two, and the DELETE's rowcount
+        ensures a code can only ever be redeemed once."""
+        try:
+            with self.lock:
+                cursor = self._ephemeral.execute('DELETE FROM ad_verifications WHERE code = ?', (code,))
+                if cursor.rowcount == 0:
+                    return False
+                self._ephemeral.commit()
+
                 conn = self._get_connection()
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM ad_verifications WHERE code = ?', (code,))
+                conn.execute('UPDATE users SET ad_downloads = ad_downloads + ? WHERE user_id = ?', (count, user_id))
                 conn.commit()
                 conn.close()
+
+            self.cache.delete(f"user_{user_id}")
+
+            try:
+                from cloud_backup import trigger_backup_on_critical_change
+                trigger_backup_on_critical_change("add_ad_downloads", user_id)
+            except Exception as e:
+                log.warning(f"Backup trigger failed for redeem_verification_code: {e}")
+
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error deleting verification code: {e}")
+            log.error(f"Error redeeming verification code for {user_id}: {e}")
             return False
 
     def cleanup_expired_sessions(self) -> Dict[str, int]:
@@ -760,25 +816,21 @@ class DatabaseManager:
         Also invalidates any cached session data.
         Returns counts of deleted items."""
         try:
-            cutoff_time = (datetime.now() - timedelta(minutes=60)).isoformat()
+            cutoff_time = time.time() - 3600
             with self.lock:
-                conn = self._get_connection()
-                cursor = conn.cursor()
-                
                 # Get session IDs before deleting to clear cache
-                cursor.execute('SELECT session_id, user_id FROM ad_sessions WHERE created_at < ?', (cutoff_time,))
+                cursor = self._ephemeral.execute('SELECT session_id, user_id FROM ad_sessions WHERE created_at < ?', (cutoff_time,))
                 expired_sessions = cursor.fetchall()
-                
+
                 # Delete expired ad sessions
-                cursor.execute('DELETE FROM ad_sessions WHERE created_at < ?', (cutoff_time,))
+                cursor = self._ephemeral.execute('DELETE FROM ad_sessions WHERE created_at < ?', (cutoff_time,))
                 deleted_sessions = cursor.rowcount
-                
+
                 # Delete expired verification codes
-                cursor.execute('DELETE FROM ad_verifications WHERE created_at < ?', (cutoff_time,))
+                cursor = self._ephemeral.execute('DELETE FROM ad_verifications WHERE created_at < ?', (cutoff_time,))
                 deleted_verifications = cursor.rowcount
-                
-                conn.commit()
-                conn.close()
+
+                self._ephemeral.commit()
             
             # Clear cache entries for affected users
             for session in expired_sessions:
@@ -786,7 +838,7 @@ class DatabaseManager:
                 self.cache.delete(f"user_{user_id}")
             
             if deleted_sessions > 0 or deleted_verifications > 0:
-                LOGGER(__name__).info(
+                log.info(
                     f"Cleaned up {deleted_sessions} expired ad sessions and "
                     f"{deleted_verifications} verification codes"
                 )
@@ -796,7 +848,7 @@ class DatabaseManager:
                 'verifications': deleted_verifications
             }
         except Exception as e:
-            LOGGER(__name__).error(f"Error cleaning up expired sessions: {e}")
+            log.error(f"Error cleaning up expired sessions: {e}")
             return {'sessions': 0, 'verifications': 0}
 
     def get_ad_downloads(self, user_id: int) -> int:
@@ -806,7 +858,7 @@ class DatabaseManager:
             user = self.get_user(user_id)
             return user.get('ad_downloads', 0) if user else 0
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting ad downloads for {user_id}: {e}")
+            log.error(f"Error getting ad downloads for {user_id}: {e}")
             return 0
 
     def get_free_downloads_remaining(self, user_id: int) -> dict:
@@ -836,7 +888,7 @@ class DatabaseManager:
                 'total': ad_downloads + daily_remaining
             }
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting free downloads remaining for {user_id}: {e}")
+            log.error(f"Error getting free downloads remaining for {user_id}: {e}")
             return {'ad_downloads': 0, 'daily_remaining': 0, 'total': 0}
 
     def get_premium_users(self) -> List[Dict]:
@@ -855,20 +907,17 @@ class DatabaseManager:
             conn.close()
             return users
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting premium users: {e}")
+            log.error(f"Error getting premium users: {e}")
             return []
     
     def get_ad_sessions_count(self) -> int:
         """Get count of active ad sessions (for memory monitoring)"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) as count FROM ad_sessions')
-            count = cursor.fetchone()['count']
-            conn.close()
-            return count
+            with self.lock:
+                cursor = self._ephemeral.execute('SELECT COUNT(*) as count FROM ad_sessions')
+                return cursor.fetchone()['count']
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting ad sessions count: {e}")
+            log.error(f"Error getting ad sessions count: {e}")
             return 0
     
     def check_legal_acceptance(self, user_id: int) -> bool:
@@ -895,7 +944,7 @@ class DatabaseManager:
             self.cache.set(cache_key, False)
             return False
         except Exception as e:
-            LOGGER(__name__).error(f"Error checking legal acceptance for {user_id}: {e}")
+            log.error(f"Error checking legal acceptance for {user_id}: {e}")
             return False
     
     def record_legal_acceptance(self, user_id: int, ip_address: Optional[str] = None) -> bool:
@@ -917,17 +966,17 @@ class DatabaseManager:
                 conn.close()
             
             self.cache.delete(f"legal_{user_id}")
-            LOGGER(__name__).info(f"Legal acceptance recorded for user {user_id}")
+            log.info(f"Legal acceptance recorded for user {user_id}")
             
             try:
                 from cloud_backup import trigger_backup_on_critical_change
                 trigger_backup_on_critical_change("legal_acceptance", user_id)
             except Exception as e:
-                LOGGER(__name__).warning(f"Backup trigger failed for legal_acceptance: {e}")
+                log.warning(f"Backup trigger failed for legal_acceptance: {e}")
             
             return True
         except Exception as e:
-            LOGGER(__name__).error(f"Error recording legal acceptance for {user_id}: {e}")
+            log.error(f"Error recording legal acceptance for {user_id}: {e}")
             return False
     
     def get_legal_acceptance_stats(self) -> Dict:
@@ -950,7 +999,7 @@ class DatabaseManager:
                 'pending_users': total_users - accepted_users
             }
         except Exception as e:
-            LOGGER(__name__).error(f"Error getting legal acceptance stats: {e}")
+            log.error(f"Error getting legal acceptance stats: {e}")
             return {'total_users': 0, 'accepted_users': 0, 'pending_users': 0}
 
 db = DatabaseManager()
@@ -12,7 +12,6 @@ CONFIGURATION (Environment Variables):
 import os
 import asyncio
 import math
-import inspect
 import psutil
 import gc
 from typing import Optional, Callable, BinaryIO, Set, Dict
@@ -21,6 +20,8 @@ from telethon.tl.types import Message, Document, TypeMessageMedia, InputPhotoFil
 from logger import LOGGER
 from FastTelethon import download_file as fast_download, upload_file as fast_upload, ParallelTransferrer
 
+log = LOGGER(__name__)
+
 CONNECTIONS_PER_TRANSFER = int(os.getenv("CONNECTIONS_PER_TRANSFER", "16"))
 
 def get_ram_usage_mb():
@@ -34,7 +35,7 @@ def create_ram_logging_callback(original_callback: Optional[Callable], file_size
     """
     logged_thresholds: Set[int] = set()
     start_ram = get_ram_usage_mb()
-    LOGGER(__name__).info(f"[RAM] {operation} START: {file_name} - RAM: {start_ram:.1f}MB")
+    log.info(f"[RAM] {operation} START: {file_name} - RAM: {start_ram:.1f}MB")
     
     def ram_logging_wrapper(current: int, total: int):
         nonlocal logged_thresholds
@@ -51,7 +52,7 @@ def create_ram_logging_callback(original_callback: Optional[Callable], file_size
                 logged_thresholds.add(threshold)
                 current_ram = get_ram_usage_mb()
                 ram_increase = current_ram - start_ram
-                LOGGER(__name__).info(
+                log.info(
                     f"[RAM] {operation} {threshold}%: {file_name} - "
                     f"RAM: {current_ram:.1f}MB (+{ram_increase:.1f}MB from start)"
                 )
@@ -83,51 +84,48 @@ async def download_media_fast(
         raise ValueError("Message has no media")
     
     if isinstance(message.media, MessageMediaPaidMedia):
-        LOGGER(__name__).warning(f"Paid media detected - attempting extended media extraction")
+        log.warning(f"Paid media detected - attempting extended media extraction")
         if hasattr(message.media, 'extended_media') and message.media.extended_media:
             extended = message.media.extended_media
             if isinstance(extended, list) and len(extended) > 0:
                 first_media = extended[0]
                 if hasattr(first_media, 'media') and first_media.media:
-                    LOGGER(__name__).info(f"Extracted media from paid media container")
+                    log.info(f"Extracted media from paid media container")
                     return await client.download_media(first_media.media, file=file, progress_callback=progress_callback)
             elif hasattr(extended, 'media') and extended.media:
-                LOGGER(__name__).info(f"Extracted single media from paid media container")
+                log.info(f"Extracted single media from paid media container")
                 return await client.download_media(extended.media, file=file, progress_callback=progress_callback)
         raise ValueError("Paid media (premium content) cannot be downloaded - the content owner requires payment to access this media")
     
     try:
         file_size = 0
         media_location = None
-        
-        if message.document:
-            file_size = message.document.size
-            media_location = message.document
-        elif message.video:
-            file_size = getattr(message.video, 'size', 0)
-            media_location = message.video
-        elif message.audio:
-            file_size = getattr(message.audio, 'size', 0)
-            media_location = message.audio
-        elif message.photo:
-            photo_sizes = [size for size in message.photo.sizes if hasattr(size, 'size')]
-            if photo_sizes:
-                largest_size = max(photo_sizes, key=lambda s: s.size)
-                file_size = largest_size.size
-                media_location = message.photo
-        elif message.voice:
-            file_size = getattr(message.voice, 'size', 0)
-            media_location = message.voice
-        elif message.video_note:
-            file_size = getattr(message.video_note, 'size', 0)
-            media_location = message.video_note
-        elif message.sticker:
-            file_size = getattr(message.sticker, 'size', 0)
-            media_location = message.sticker
+
+        # Probe each media attribute exactly once - Telethon computes these
+        # as properties on every access, so the old if/elif chain paid for
+        # each one twice (condition + use)
+        for attr in ('document', 'video', 'audio', 'photo', 'voice', 'video_note', 'sticker'):
+            media = getattr(message, attr, None)
+            if media is None:
+                continue
+            if attr == 'photo':
+                # Single linear scan instead of filter-then-max (no temp list, one pass)
+                largest = 0
+                for size in media.sizes:
+                    photo_size = getattr(size, 'size', 0)
+                    if photo_size > largest:
+                        largest = photo_size
+                if largest > 0:
+                    file_size = largest
+                    media_location = media
+            else:
+                file_size = getattr(media, 'size', 0)
+                media_location = media
+            break
         
         connection_count = get_connection_count_for_size(file_size)
         
-        LOGGER(__name__).info(
+        log.info(
             f"Starting download: {os.path.basename(file)} "
             f"({file_size/1024/1024:.1f}MB, {connection_count} connections)"
         )
@@ -136,7 +134,8 @@ async def download_media_fast(
         ram_callback = create_ram_logging_callback(progress_callback, file_size, "DOWNLOAD", file_name)
         
         if media_location and file_size > 0:
-            with open(file, 'wb') as f:
+            # 1MB write buffer so each downloaded part hits the disk in one write
+            with open(file, 'wb', buffering=1024 * 1024) as f:
                 await fast_download(
                     client=client,
                     location=media_location,
@@ -146,15 +145,15 @@ async def download_media_fast(
                     connection_count=connection_count
                 )
             end_ram = get_ram_usage_mb()
-            LOGGER(__name__).info(f"[RAM] DOWNLOAD COMPLETE: {file_name} - RAM before GC: {end_ram:.1f}MB")
+            log.info(f"[RAM] DOWNLOAD COMPLETE: {file_name} - RAM before GC: {end_ram:.1f}MB")
             
             gc.collect()
             after_gc_ram = get_ram_usage_mb()
             ram_released = end_ram - after_gc_ram
-            LOGGER(__name__).info(f"[RAM] DOWNLOAD GC: {file_name} - RAM after GC: {after_gc_ram:.1f}MB (released: {ram_released:.1f}MB)")
+            log.info(f"[RAM] DOWNLOAD GC: {file_name} - RAM after GC: {after_gc_ram:.1f}MB (released: {ram_released:.1f}MB)")
             return file
         else:
-            LOGGER(__name__).warning(
+            log.warning(
                 f"FastTelethon bypassed for {file_name}: media_location={media_location is not None}, "
                 f"file_size={file_size} - falling back to standard download"
             )
@@ -164,21 +163,26 @@ async def download_media_fast(
         error_str = str(e).lower()
         if 'paidmedia' in error_str or 'paid' in error_str:
             raise ValueError("Paid media (premium content) cannot be downloaded - the content owner requires payment to access this media")
-        LOGGER(__name__).error(f"FastTelethon download failed, falling back to standard: {e}")
+        log.error(f"FastTelethon download failed, falling back to standard: {e}")
         return await client.download_media(message, file=file, progress_callback=progress_callback)
 
 async def upload_media_fast(
     client: TelegramClient,
     file_path: str,
-    progress_callback: Optional[Callable] = None
+    progress_callback: Optional[Callable] = None,
+    file_size: Optional[int] = None
 ):
     """
     Upload media using FastTelethon with full connection capacity.
-    
+
     Since each user has their own Telegram session, each upload can
     use the full connection capacity without needing global pooling.
+
+    Callers that already know the file size can pass it to skip a
+    redundant os.path.getsize stat call.
     """
-    file_size = os.path.getsize(file_path)
+    if file_size is None:
+        file_size = os.path.getsize(file_path)
     connection_count = get_connection_count_for_size(file_size)
     
     file_handle = None
@@ -186,7 +190,7 @@ async def upload_media_fast(
     
     try:
         file_name = os.path.basename(file_path)
-        LOGGER(__name__).info(
+        log.info(
             f"Starting upload: {file_name} "
             f"({file_size/1024/1024:.1f}MB, {connection_count} connections)"
         )
@@ -198,15 +202,16 @@ async def upload_media_fast(
             client=client,
             file=file_handle,
             progress_callback=ram_callback,
-            connection_count=connection_count
+            connection_count=connection_count,
+            file_size=file_size
         )
         
         end_ram = get_ram_usage_mb()
-        LOGGER(__name__).info(f"[RAM] UPLOAD COMPLETE: {file_name} - RAM before GC: {end_ram:.1f}MB")
+        log.info(f"[RAM] UPLOAD COMPLETE: {file_name} - RAM before GC: {end_ram:.1f}MB")
         return result
         
     except Exception as e:
-        LOGGER(__name__).error(f"FastTelethon upload failed: {e}")
+        log.error(f"FastTelethon upload failed: {e}")
         return None
         
     finally:
@@ -220,7 +225,7 @@ async def upload_media_fast(
         gc.collect()
         after_gc = get_ram_usage_mb()
         ram_released = before_gc - after_gc
-        LOGGER(__name__).info(f"[RAM] UPLOAD GC: {os.path.basename(file_path)} - RAM after GC: {after_gc:.1f}MB (released: {ram_released:.1f}MB)")
+        log.info(f"[RAM] UPLOAD GC: {os.path.basename(file_path)} - RAM after GC: {after_gc:.1f}MB (released: {ram_released:.1f}MB)")
 
 
 def get_connection_count_for_size(file_size: int, max_count: int = CONNECTIONS_PER_TRANSFER) -> int:
@@ -10,6 +10,8 @@ from typing import Optional
 from asyncio.subprocess import PIPE
 from asyncio import create_subprocess_exec, create_subprocess_shell, wait_for
 
+log = LOGGER(__name__)
+
 def get_intra_request_delay(is_premium):
     """
     Get the appropriate delay between items in media groups or batch downloads.
@@ -41,7 +43,8 @@ from helpers.msg import (
     get_file_name
 )
 
-from helpers.transfer import download_media_fast
+from helpers.transfer import download_media_fast, upload_media_fast
+from memory_monitor import memory_monitor
 
 # Ultra-minimal progress template (near-zero RAM)
 # No string formatting needed - computed inline
@@ -83,7 +86,7 @@ async def has_video_stream(video_path):
         try:
             stdout, stderr = await wait_for(proc.communicate(), timeout=10.0)
         except asyncio.TimeoutError:
-            LOGGER(__name__).debug(f"ffprobe timeout checking {os.path.basename(video_path)}")
+            log.debug(f"ffprobe timeout checking {os.path.basename(video_path)}")
             if proc:
                 try:
                     proc.kill()
@@ -97,7 +100,7 @@ async def has_video_stream(video_path):
         
         if proc.returncode != 0 or not stdout_str:
             if stderr_str:
-                LOGGER(__name__).debug(f"ffprobe error for {os.path.basename(video_path)}: {stderr_str[:100]}")
+                log.debug(f"ffprobe error for {os.path.basename(video_path)}: {stderr_str[:100]}")
             return False, None, stderr_str or "No video stream found"
         
         parts = stdout_str.split(',')
@@ -111,7 +114,7 @@ async def has_video_stream(video_path):
             return True, duration, None
         return False, None, "No video stream detected"
     except Exception as e:
-        LOGGER(__name__).debug(f"has_video_stream exception: {e}")
+        log.debug(f"has_video_stream exception: {e}")
         if proc and proc.returncode is None:
             try:
                 proc.kill()
@@ -148,11 +151,11 @@ async def create_placeholder_thumbnail(thumb_path, width=320, height=240):
         
         if proc.returncode == 0 and os.path.exists(thumb_path):
             if os.path.getsize(thumb_path) > 0:
-                LOGGER(__name__).debug(f"Placeholder thumbnail created")
+                log.debug(f"Placeholder thumbnail created")
                 return thumb_path
         return None
     except Exception as e:
-        LOGGER(__name__).debug(f"Placeholder creation failed: {e}")
+        log.debug(f"Placeholder creation failed: {e}")
         return None
     finally:
         if proc and proc.returncode is None:
@@ -182,7 +185,7 @@ async def generate_thumbnail(video_path, thumb_path=None, duration=None):
     
     has_video, probe_duration, error_msg = await has_video_stream(video_path)
     if not has_video:
-        LOGGER(__name__).info(f"Skipping thumbnail for {os.path.basename(video_path)}: {error_msg}")
+        log.info(f"Skipping thumbnail for {os.path.basename(video_path)}: {error_msg}")
         return None
     
     if probe_duration and not duration:
@@ -192,7 +195,7 @@ async def generate_thumbnail(video_path, thumb_path=None, duration=None):
     try:
         file_size = os.path.getsize(video_path)
     except Exception as e:
-        LOGGER(__name__).debug(f"Could not determine file size: {e}")
+        log.debug(f"Could not determine file size: {e}")
     
     base_timeout = 10.0
     if file_size > 100 * 1024 * 1024:
@@ -261,13 +264,13 @@ async def generate_thumbnail(video_path, thumb_path=None, duration=None):
             try:
                 stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=strategy["timeout"])
             except asyncio.TimeoutError:
-                LOGGER(__name__).debug(f"Thumbnail '{strategy['name']}' timed out ({strategy['timeout']}s)")
+                log.debug(f"Thumbnail '{strategy['name']}' timed out ({strategy['timeout']}s)")
                 if proc:
                     try:
                         proc.kill()
                         await asyncio.wait_for(proc.wait(), timeout=3.0)
                     except Exception as kill_err:
-                        LOGGER(__name__).debug(f"Error killing process: {kill_err}")
+                        log.debug(f"Error killing process: {kill_err}")
                 continue
             
             if proc.returncode == 0:
@@ -275,7 +278,7 @@ async def generate_thumbnail(video_path, thumb_path=None, duration=None):
                     if os.path.exists(thumb_path):
                         thumb_size = os.path.getsize(thumb_path)
                         if thumb_size > 0:
-                            LOGGER(__name__).debug(f"Thumbnail generated: {strategy['name']}")
+                            log.debug(f"Thumbnail generated: {strategy['name']}")
                             return thumb_path
                         else:
                             try:
@@ -283,14 +286,14 @@ async def generate_thumbnail(video_path, thumb_path=None, duration=None):
                             except:
                                 pass
                 except OSError as e:
-                    LOGGER(__name__).debug(f"File check error: {e}")
+                    log.debug(f"File check error: {e}")
             else:
                 stderr_str = stderr.decode().strip() if stderr else ""
                 if stderr_str and len(stderr_str) > 0:
-                    LOGGER(__name__).debug(f"Strategy '{strategy['name']}' failed: {stderr_str[:50]}")
+                    log.debug(f"Strategy '{strategy['name']}' failed: {stderr_str[:50]}")
                     
         except Exception as e:
-            LOGGER(__name__).debug(f"Strategy '{strategy['name']}' error: {type(e).__name__}")
+            log.debug(f"Strategy '{strategy['name']}' error: {type(e).__name__}")
             if proc:
                 try:
                     if proc.returncode is None:
@@ -304,17 +307,17 @@ async def generate_thumbnail(video_path, thumb_path=None, duration=None):
                     proc.kill()
                     await asyncio.wait_for(proc.wait(), timeout=2.0)
                 except Exception as cleanup_err:
-                    LOGGER(__name__).debug(f"Process cleanup error: {cleanup_err}")
+                    log.debug(f"Process cleanup error: {cleanup_err}")
                 finally:
                     proc = None
     
-    LOGGER(__name__).debug(f"All strategies failed, creating placeholder")
+    log.debug(f"All strategies failed, creating placeholder")
     placeholder = await create_placeholder_thumbnail(thumb_path)
     if placeholder:
-        LOGGER(__name__).debug(f"Using placeholder thumbnail for {os.path.basename(video_path)}")
+        log.debug(f"Using placeholder thumbnail for {os.path.basename(video_path)}")
         return placeholder
     
-    LOGGER(__name__).warning(f"Thumbnail generation completely failed: {os.path.basename(video_path)}")
+    log.warning(f"Thumbnail generation completely failed: {os.path.basename(video_path)}")
     try:
         if os.path.exists(thumb_path):
             os.remove(thumb_path)
@@ -342,7 +345,7 @@ async def get_media_info(path):
                 import json
                 data = json.loads(result[0])
         except Exception as e:
-            LOGGER(__name__).error(f"Failed to parse ffprobe JSON: {e}")
+            log.error(f"Failed to parse ffprobe JSON: {e}")
             return 0, None, None
         
         duration = 0
@@ -373,7 +376,7 @@ async def get_media_info(path):
                         stream_duration = stream.get("duration")
                         if stream_duration and stream_duration != "N/A":
                             duration = round(float(stream_duration))
-                            LOGGER(__name__).info(f"Got duration from video stream: {duration}s")
+                            log.info(f"Got duration from video stream: {duration}s")
                             break
                     except (ValueError, TypeError):
                         continue
@@ -410,7 +413,7 @@ class ProgressThrottle:
             del self.message_throttles[key]
         
         if stale_keys:
-            LOGGER(__name__).debug(f"Cleaned up {len(stale_keys)} stale progress throttle entries")
+            log.debug(f"Cleaned up {len(stale_keys)} stale progress throttle entries")
     
     def should_update(self, message_id, current, total, now):
         """
@@ -492,7 +495,7 @@ class ProgressThrottle:
             # Exponential backoff: 5s -> 10s -> 20s -> 40s -> 60s (max)
             throttle['backoff_duration'] = min(throttle['backoff_duration'] * 2, 60)
             throttle['cooldown_until'] = now + throttle['backoff_duration']
-            LOGGER(__name__).info(f"Rate limited - backing off for {throttle['backoff_duration']}s")
+            log.info(f"Rate limited - backing off for {throttle['backoff_duration']}s")
     
     def cleanup(self, message_id):
         """Remove throttle data when done"""
@@ -575,13 +578,13 @@ async def safe_progress_callback(current, total, *args):
             # This is a rate limit error - mark it and back off
             if progress_message:
                 _progress_throttle.mark_rate_limited(progress_message.id, time())
-            LOGGER(__name__).warning(f"Rate limited by Telegram API - backing off")
+            log.warning(f"Rate limited by Telegram API - backing off")
         # Silently ignore errors related to deleted or invalid messages
         elif any(err in error_str for err in ['message_id_invalid', 'message not found', 'message to edit not found', 'message can\'t be edited']):
-            LOGGER(__name__).debug(f"Progress message was deleted or invalid, ignoring: {e}")
+            log.debug(f"Progress message was deleted or invalid, ignoring: {e}")
         else:
             # Log other errors but don't raise to avoid interrupting downloads
-            LOGGER(__name__).warning(f"Progress callback error: {e}")
+            log.warning(f"Progress callback error: {e}")
 
 
 async def forward_to_dump_channel(bot, sent_message, user_id, caption=None, source_url=None):
@@ -625,10 +628,10 @@ async def forward_to_dump_channel(bot, sent_message, user_id, caption=None, sour
             caption=custom_caption
         )
         
-        LOGGER(__name__).info(f"✅ Sent media to dump channel for user {user_id} (RAM-efficient, no re-upload, no 'Forwarded from' label)")
+        log.info(f"✅ Sent media to dump channel for user {user_id} (RAM-efficient, no re-upload, no 'Forwarded from' label)")
     except Exception as e:
         # Silently log errors - don't interrupt user's download
-        LOGGER(__name__).warning(f"Failed to send to dump channel: {e}")
+        log.warning(f"Failed to send to dump channel: {e}")
 
 # Generate progress args for downloading/uploading (minimal tuple - low RAM)
 def progressArgs(action: str, progress_message, start_time):
@@ -651,19 +654,18 @@ async def send_media(
     if not await fileSizeLimit(file_size, message, "upload"):
         return False
 
-    from memory_monitor import memory_monitor
     memory_monitor.log_memory_snapshot("Upload Start", f"User {user_id or 'unknown'}: {os.path.basename(media_path)} ({media_type})", silent=True)
     
     progress_args = progressArgs("📤 Uploading", progress_message, start_time)
-    LOGGER(__name__).debug(f"Uploading media: {media_path} ({media_type})")
+    log.debug(f"Uploading media: {media_path} ({media_type})")
 
     if media_type == "photo":
-        from helpers.transfer import upload_media_fast
         
         fast_file = await upload_media_fast(
-            bot, 
-            media_path, 
-            progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args)
+            bot,
+            media_path,
+            progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args),
+            file_size=file_size
         )
         
         sent_message = None
@@ -714,12 +716,12 @@ async def send_media(
         
         sent_message = None
         try:
-            from helpers.transfer import upload_media_fast
             
             fast_file = await upload_media_fast(
                 bot,
                 media_path,
-                progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args)
+                progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args),
+                file_size=file_size
             )
             
             if fast_file:
@@ -743,7 +745,7 @@ async def send_media(
                     force_document=False
                 )
         except Exception as e:
-            LOGGER(__name__).error(f"Upload failed: {e}")
+            log.error(f"Upload failed: {e}")
             raise
         finally:
             # Clean up thumbnail file
@@ -772,12 +774,12 @@ async def send_media(
                 voice=False
             ))
         
-        from helpers.transfer import upload_media_fast
         
         fast_file = await upload_media_fast(
             bot,
             media_path,
-            progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args)
+            progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args),
+            file_size=file_size
         )
         
         sent_message = None
@@ -808,12 +810,12 @@ async def send_media(
         memory_monitor.log_memory_snapshot("Upload Complete", f"User {user_id or 'unknown'}: {os.path.basename(media_path)} (audio)", silent=True)
         return True
     elif media_type == "document":
-        from helpers.transfer import upload_media_fast
         
         fast_file = await upload_media_fast(
             bot,
             media_path,
-            progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args)
+            progress_callback=lambda c, t: safe_progress_callback(c, t, *progress_args),
+            file_size=file_size
         )
         
         sent_message = None
@@ -883,13 +885,13 @@ async def _process_single_media_file(
     )
     
     if not result_path:
-        LOGGER(__name__).warning(f"File {idx}/{total_files} download failed: no media path returned")
+        log.warning(f"File {idx}/{total_files} download failed: no media path returned")
         return None, False
     
     # RAM OPTIMIZATION: Release download buffers before upload starts
     # This ensures peak RAM usage is minimized by clearing download memory before allocating upload buffers
     gc.collect()
-    LOGGER(__name__).debug(f"RAM released after download, before upload: file {idx}/{total_files}")
+    log.debug(f"RAM released after download, before upload: file {idx}/{total_files}")
     
     # Determine media type from msg attributes
     media_type = (
@@ -903,7 +905,7 @@ async def _process_single_media_file(
     caption_text = msg.text or ""
     
     # STEP 2: Upload this file
-    LOGGER(__name__).info(f"Uploading file {idx}/{total_files} to user (via send_media)")
+    log.info(f"Uploading file {idx}/{total_files} to user (via send_media)")
     upload_success = await send_media(
         bot=bot,
         message=user_message,
@@ -944,7 +946,6 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
     Returns:
         int: Number of files successfully downloaded and sent (0 if failed)
     """
-    from memory_monitor import memory_monitor
     
     # Log memory at start of media group processing
     memory_monitor.log_memory_snapshot("MediaGroup Start", f"User {user_id or 'unknown'}: Starting media group processing", silent=True)
@@ -992,11 +993,11 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
             user_type = db.get_user_type(user_id)
             is_premium = user_type in ['paid', 'admin']
         except Exception as e:
-            LOGGER(__name__).warning(f"Could not determine user tier, using free tier: {e}")
+            log.warning(f"Could not determine user tier, using free tier: {e}")
     
     start_time = time()
     progress_message = await message.reply(f"📥 Processing media group ({total_files} files)...")
-    LOGGER(__name__).info(
+    log.info(
         f"Processing media group with {total_files} items (one-at-a-time mode for low RAM usage)..."
     )
 
@@ -1020,7 +1021,7 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
             msg = await client_for_download.get_messages(chat_id, ids=msg_id)
             
             if not msg or not (msg.media or msg.photo or msg.video or msg.document or msg.audio):
-                LOGGER(__name__).warning(f"File {idx}/{total_files}: No media found in message {msg_id}")
+                log.warning(f"File {idx}/{total_files}: No media found in message {msg_id}")
                 continue
             
             # Get filename from message
@@ -1032,7 +1033,7 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
             media_path = download_path
             
             # STEP 1 & 2: Download and upload using external helper (no closure capture)
-            LOGGER(__name__).info(f"Downloading file {idx}/{total_files}: {filename} (45min timeout)")
+            log.info(f"Downloading file {idx}/{total_files}: {filename} (45min timeout)")
             
             # Execute with per-file timeout (45 minutes)
             # CRITICAL: Uses external helper function to avoid closure capture
@@ -1061,13 +1062,13 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
                 if upload_success:
                     files_sent_count += 1
                     elapsed = time() - file_start_time
-                    LOGGER(__name__).info(f"Successfully processed file {idx}/{total_files} in {elapsed:.1f}s")
+                    log.info(f"Successfully processed file {idx}/{total_files} in {elapsed:.1f}s")
                 else:
-                    LOGGER(__name__).warning(f"File {idx}/{total_files} was not sent (rejected by size limit or other error)")
+                    log.warning(f"File {idx}/{total_files} was not sent (rejected by size limit or other error)")
                     
             except asyncio.TimeoutError:
                 elapsed = time() - file_start_time
-                LOGGER(__name__).error(
+                log.error(
                     f"PER-FILE TIMEOUT: File {idx}/{total_files} timed out after {elapsed:.1f}s "
                     f"(limit: {PER_FILE_TIMEOUT_SECONDS}s / 45min)"
                 )
@@ -1083,19 +1084,19 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
                 try:
                     from database_sqlite import db
                     await cleanup_download_delayed(media_path, user_id, db)
-                    LOGGER(__name__).info(f"Cleaned up file {idx}/{total_files}: {os.path.basename(media_path)}")
+                    log.info(f"Cleaned up file {idx}/{total_files}: {os.path.basename(media_path)}")
                 except Exception as cleanup_err:
-                    LOGGER(__name__).warning(f"Failed to cleanup file {idx}/{total_files}: {cleanup_err}")
+                    log.warning(f"Failed to cleanup file {idx}/{total_files}: {cleanup_err}")
             
             # STEP 4: Tier-aware cooldown between files (same as single file downloads)
             # This wait time prevents RAM spikes by allowing memory to be fully reclaimed
             if idx < total_files:
                 delay = get_intra_request_delay(is_premium)
-                LOGGER(__name__).info(f"⏳ Waiting {delay}s before next file (RAM cooldown, same as single files)")
+                log.info(f"⏳ Waiting {delay}s before next file (RAM cooldown, same as single files)")
                 await asyncio.sleep(delay)
             
         except asyncio.CancelledError:
-            LOGGER(__name__).info(f"File {idx}/{total_files} processing cancelled")
+            log.info(f"File {idx}/{total_files} processing cancelled")
             if media_path:
                 try:
                     from database_sqlite import db
@@ -1105,7 +1106,7 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
             raise
             
         except Exception as e:
-            LOGGER(__name__).error(f"Error processing file {idx}/{total_files} from message {msg_id}: {e}")
+            log.error(f"Error processing file {idx}/{total_files} from message {msg_id}: {e}")
             # Clean up on error and release RAM
             if media_path:
                 try:
@@ -1117,7 +1118,7 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
             # Apply tier-aware cooldown even on error (same as single files)
             if idx < total_files:
                 delay = get_intra_request_delay(is_premium)
-                LOGGER(__name__).info(f"⏳ Waiting {delay}s after error before next file")
+                log.info(f"⏳ Waiting {delay}s after error before next file")
                 await asyncio.sleep(delay)
             
             continue
@@ -1152,5 +1153,5 @@ async def processMediaGroup(chat_message, bot, message, user_id=None, user_clien
     
     # Don't send completion message here - let main.py handle it based on user type
     # This allows customized messages for free vs premium users
-    LOGGER(__name__).info(f"Media group complete: {files_sent_count}/{total_files} files sent successfully")
+    log.info(f"Media group complete: {files_sent_count}/{total_files} files sent successfully")
     return files_sent_count
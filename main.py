@@ -87,6 +87,14 @@ phone_auth_handler = PhoneAuthHandler(PyroConf.API_ID, PyroConf.API_HASH)
 RUNNING_TASKS = set()
 USER_TASKS = {}
 
+# Static "Update Channel" keyboard shared by /start and /help.
+# Built once at import time - the channel link never changes within a
+# process, so there's no point re-decoding it and rebuilding the markup
+# (and its telethon form) on every command.
+UPDATE_CHANNEL_MARKUP = InlineKeyboardMarkup(
+    [[InlineKeyboardButton.url("📢 Update Channel", get_channel_link(primary=True))]]
+)
+
 # Track bot start time for filtering old updates
 bot.start_time = None
 
@@ -219,9 +227,7 @@ async def start(event):
     # Verify attribution
     verify_attribution()
     
-    markup = InlineKeyboardMarkup(
-        [[InlineKeyboardButton.url("📢 Update Channel", get_channel_link(primary=True))]]
-    )
+    markup = UPDATE_CHANNEL_MARKUP
     
     # Add creator attribution to welcome message
     welcome_text += f"\n\n💡 **Created by:** {get_creator_username()}"
@@ -313,9 +319,7 @@ async def help_command(event):
             "   `/stats` - Bot statistics"
         )
 
-    markup = InlineKeyboardMarkup(
-        [[InlineKeyboardButton.url("📢 Update Channel", get_channel_link(primary=True))]]
-    )
+    markup = UPDATE_CHANNEL_MARKUP
     
     help_text += f"\n\n💡 **Bot by:** {get_creator_username()} | {get_channel_link(primary=True)}"
     
@@ -1764,6 +1768,9 @@ if __name__ == "__main__":
                         result = await download_manager.sweep_stale_items(max_age_minutes=60)
                         if result['orphaned_tasks'] > 0 or result['expired_cooldowns'] > 0:
                             LOGGER(__name__).info(f"Sweep completed: {result}")
+                        # Batched expiry of ad sessions/codes (no per-request deletes)
+                        db.cleanup_expired_sessions()
+                        db.checkpoint_wal()
                     except asyncio.CancelledError:
                         break
                     except Exception as e:
@@ -1784,6 +1791,10 @@ if __name__ == "__main__":
                 LOGGER(__name__).info("Disconnected all user sessions")
             except Exception as e:
                 LOGGER(__name__).error(f"Error disconnecting sessions: {e}")
+            try:
+                await richads.close()
+            except Exception as e:
+                LOGGER(__name__).error(f"Error closing RichAds session: {e}")
             LOGGER(__name__).info("Bot Stopped")
     
     import asyncio
@@ -4,11 +4,19 @@
 
 import os
 import html
+import time
+import asyncio
 import aiohttp
+import orjson
 from typing import Optional, Dict, Any, List
+from cache import LRUCache
+from config import PyroConf
 from logger import LOGGER
+from database_sqlite import db
 from telethon_helpers import InlineKeyboardButton, InlineKeyboardMarkup
 
+log = LOGGER(__name__)
+
 RICHADS_API_URL = "http://15068.xml.adx1.com/telegram-mb"
 
 class RichAdsManager:
@@ -16,16 +24,41 @@ class RichAdsManager:
         self.publisher_id = os.getenv("RICHADS_PUBLISHER_ID", "")
         self.widget_id = os.getenv("RICHADS_WIDGET_ID", "")
         self.production = os.getenv("RICHADS_PRODUCTION", "true").lower() == "true"
-        
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Bounded LRU so the cooldown map can't grow one entry per user forever
+        # (entries expire with the cooldown window, so presence == still cooling down)
+        self.user_last_ad = LRUCache(max_size=10000, default_ttl=PyroConf.RICHADS_AD_COOLDOWN)
+        # Keep strong refs to in-flight impression pings so they aren't GC'd mid-task
+        self._ping_tasks: set = set()
+
         if self.publisher_id:
-            LOGGER(__name__).info(f"RichAds initialized - Publisher: {self.publisher_id}, Production: {self.production}")
+            log.info(f"RichAds initialized - Publisher: {self.publisher_id}, Production: {self.production}")
         else:
-            LOGGER(__name__).warning("RichAds not configured - RICHADS_PUBLISHER_ID not set")
-    
+            log.warning("RichAds not configured - RICHADS_PUBLISHER_ID not set")
+
     def is_enabled(self) -> bool:
         """Check if RichAds is configured"""
         return bool(self.publisher_id)
-    
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared ClientSession, creating it lazily on first use.
+
+        Reusing one session keeps TCP/TLS connections to the RichAds API
+        alive between requests instead of paying a fresh handshake per ad.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared ClientSession (call at bot shutdown)"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            self._session = None
+
     async def fetch_ad(self, language_code: str = "en", telegram_id: str = None) -> Optional[List[Dict[str, Any]]]:
         """Fetch ad from RichAds API"""
         if not self.is_enabled():
@@ -43,47 +76,66 @@ class RichAdsManager:
             payload["telegram_id"] = str(telegram_id)
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(RICHADS_API_URL, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        ads = await response.json()
-                        if ads and len(ads) > 0:
-                            LOGGER(__name__).debug(f"RichAds: Got {len(ads)} ad(s) for user {telegram_id}")
-                            return ads
-                        LOGGER(__name__).debug(f"RichAds: No ads available for user {telegram_id}")
-                        return None
-                    else:
-                        response_text = await response.text()
-                        LOGGER(__name__).warning(f"RichAds error {response.status}: {response_text[:100]}")
-                        return None
+            session = await self._get_session()
+            async with session.post(RICHADS_API_URL, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    # orjson (already a dependency) decodes the ad payload
+                    # several times faster than the stdlib json parser
+                    ads = await response.json(loads=orjson.loads)
+                    if ads and len(ads) > 0:
+                        log.debug(f"RichAds: Got {len(ads)} ad(s) for user {telegram_id}")
+                        return ads
+                    log.debug(f"RichAds: No ads available for user {telegram_id}")
+                    return None
+                else:
+                    response_text = await response.text()
+                    log.warning(f"RichAds error {response.status}: {response_text[:100]}")
+                    return None
         except Exception as e:
-            LOGGER(__name__).warning(f"RichAds fetch error: {str(e)[:100]}")
+            log.warning(f"RichAds fetch error: {str(e)[:100]}")
             return None
     
     async def notify_impression(self, notification_url: str) -> bool:
         """Notify RichAds that ad impression happened"""
         try:
-            async with aiohttp.ClientSession() as session:
+            session = await self._get_session()
+            # HEAD first - only the status matters, so skip the body transfer
+            # entirely and keep the connection clean for reuse
+            async with session.head(notification_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                status = response.status
+            if status in (405, 501):
+                # Endpoint doesn't accept HEAD - fall back to a plain GET
                 async with session.get(notification_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        LOGGER(__name__).debug("RichAds impression tracked")
-                        return True
-                    LOGGER(__name__).warning(f"RichAds impression failed: {response.status}")
-                    return False
+                    status = response.status
+            if status == 200:
+                log.debug("RichAds impression tracked")
+                return True
+            log.warning(f"RichAds impression failed: {status}")
+            return False
         except Exception as e:
-            LOGGER(__name__).warning(f"RichAds impression error: {str(e)[:100]}")
+            log.warning(f"RichAds impression error: {str(e)[:100]}")
             return False
     
     async def send_ad_to_user(self, client, chat_id: int, language_code: str = "en") -> bool:
         """Fetch and send RichAd to user as photo message"""
         if not self.is_enabled():
-            LOGGER(__name__).debug("RichAds not enabled")
+            log.debug("RichAds not enabled")
             return False
-            
+
+        # Cooldown check comes first - suppressed calls never touch the database
+        current_time = time.time()
+        if self.user_last_ad.get(chat_id) is not None:
+            log.debug(f"RichAds: Cooldown active for user {chat_id}, skipping ad")
+            return False
+
+        # No ads for premium/admin users (db caches the user lookup internally)
+        if db.get_user_type(chat_id) in ('paid', 'admin'):
+            return False
+
         ads = await self.fetch_ad(language_code=language_code, telegram_id=str(chat_id))
         
         if not ads or len(ads) == 0:
-            LOGGER(__name__).debug(f"RichAds: No ads returned for user {chat_id}")
+            log.debug(f"RichAds: No ads returned for user {chat_id}")
             return False
         
         ad = ads[0]  # Use first ad
@@ -139,14 +191,19 @@ class RichAdsManager:
                     parse_mode='md'
                 )
             
-            # Notify impression
+            self.user_last_ad.set(chat_id, current_time)
+
+            # Fire the impression ping in the background - the user's response
+            # shouldn't wait on the tracking round-trip
             if ad.get("notification_url"):
-                await self.notify_impression(ad["notification_url"])
-            
+                task = asyncio.create_task(self.notify_impression(ad["notification_url"]))
+                self._ping_tasks.add(task)
+                task.add_done_callback(self._ping_tasks.discard)
+
             return True
             
         except Exception as e:
-            LOGGER(__name__).warning(f"RichAds send error: {str(e)[:100]}")
+            log.warning(f"RichAds send error: {str(e)[:100]}")
             return False
 
 
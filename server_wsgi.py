@@ -1287,6 +1287,8 @@ async def cleanup_watchdog_task():
                         f"🧹 Cleanup watchdog: removed {cleanup_result['sessions']} expired ad sessions "
                         f"and {cleanup_result['verifications']} verification codes"
                     )
+                # Keep the WAL file from growing unbounded between restarts
+                db.checkpoint_wal()
             except Exception as e:
                 LOGGER(__name__).error(f"Error in ad sessions cleanup: {e}")
             
@@ -1456,6 +1458,13 @@ def run_bot():
                 main.LOGGER(__name__).info("Bot disconnected")
             except Exception as e:
                 main.LOGGER(__name__).error(f"Error disconnecting bot: {e}")
+
+            try:
+                from richads import richads
+                await richads.close()
+                main.LOGGER(__name__).info("RichAds HTTP session closed")
+            except Exception as e:
+                main.LOGGER(__name__).error(f"Error closing RichAds session: {e}")
             
             # Then cancel background tasks to prevent "Task was destroyed" errors
             try: